@@ -4,6 +4,8 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
+import concurrent.futures
 import hashlib
 import json
 import os
@@ -11,9 +13,62 @@ import shutil
 import subprocess
 import sys
 import tempfile
+import venv
 from pathlib import Path
 from typing import Dict
 
+try:
+    import blake3
+except ImportError:  # pragma: no cover - optional dependency
+    blake3 = None
+
+
+# Maps (variant, building from source) to the module PyInstaller must
+# collect and the entry module exposing main():
+# - aider-ce from source (GitHub): 'aider' module with aider.main:main
+# - aider-ce from PyPI (cecli-dev): 'cecli' module with cecli.main:main
+# - aider-chat: 'aider' module with aider.__main__:main
+LAUNCHER_CONFIGS: Dict[tuple[str, bool], tuple[str, str]] = {
+    ("aider-ce", True): ("aider", "aider.main"),
+    ("aider-ce", False): ("cecli", "cecli.main"),
+    ("aider-chat", True): ("aider", "aider.__main__"),
+    ("aider-chat", False): ("aider", "aider.__main__"),
+}
+
+LAUNCHER_TEMPLATE = """\
+from {entry_module} import main
+
+
+if __name__ == "__main__":
+    main()
+"""
+
+# Long-lived helper executed with the venv's interpreter: imports pip once
+# and then services install commands line by line, so each pip call skips
+# a fresh interpreter startup plus pip's own import cost.
+PIP_DRIVER_SOURCE = """\
+import json
+import sys
+
+from pip._internal.cli.main import main as pip_main
+
+for line in sys.stdin:
+    try:
+        code = pip_main(json.loads(line))
+    except SystemExit as exc:  # some pip paths exit instead of returning
+        # sys.exit() also takes None or a message; normalize to an int so
+        # the sentinel line stays parseable, and surface the message the
+        # interpreter would otherwise have printed.
+        if isinstance(exc.code, int):
+            code = exc.code
+        elif exc.code is None:
+            code = 0
+        else:
+            print(exc.code, file=sys.stderr, flush=True)
+            code = 1
+    print(f"::pip-exit {code}", flush=True)
+"""
+
 
 def run(
     cmd: list[str],
@@ -25,12 +80,96 @@ def run(
     subprocess.run(cmd, check=True, env=env, cwd=str(cwd) if cwd else None)
 
 
-def sha256sum(path: Path) -> str:
-    digest = hashlib.sha256()
+async def run_async(
+    cmd: list[str],
+    *,
+    env: Dict[str, str] | None = None,
+    cwd: Path | None = None,
+) -> None:
+    print(f":: Running: {' '.join(cmd)}")
+    proc = await asyncio.create_subprocess_exec(
+        *cmd, env=env, cwd=str(cwd) if cwd else None
+    )
+    returncode = await proc.wait()
+    if returncode:
+        raise subprocess.CalledProcessError(returncode, cmd)
+
+
+class PipDriver:
+    """Runs pip commands through one persistent venv subprocess.
+
+    Commands are serialized through the driver, which preserves pip's
+    usual semantics (hash checking included) while amortizing interpreter
+    startup and pip's import across every invocation of a build.
+    """
+
+    def __init__(self, venv_python: Path, tmp_path: Path, env: Dict[str, str]) -> None:
+        self._driver_path = tmp_path / "pip_driver.py"
+        self._driver_path.write_text(PIP_DRIVER_SOURCE, encoding="utf-8")
+        self._venv_python = venv_python
+        self._env = env
+        self._proc: asyncio.subprocess.Process | None = None
+
+    async def start(self) -> None:
+        self._proc = await asyncio.create_subprocess_exec(
+            str(self._venv_python),
+            str(self._driver_path),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            env=self._env,
+        )
+
+    async def run(self, args: list[str]) -> None:
+        assert self._proc is not None and self._proc.stdin is not None
+        print(f":: pip {' '.join(args)}")
+        self._proc.stdin.write((json.dumps(args) + "\n").encode("utf-8"))
+        await self._proc.stdin.drain()
+        assert self._proc.stdout is not None
+        while line := await self._proc.stdout.readline():
+            if line.startswith(b"::pip-exit "):
+                returncode = int(line.split()[1])
+                if returncode:
+                    raise subprocess.CalledProcessError(returncode, ["pip"] + args)
+                return
+            sys.stdout.buffer.write(line)
+            sys.stdout.buffer.flush()
+        raise RuntimeError("pip driver exited before completing the command")
+
+    async def close(self) -> None:
+        if self._proc is not None and self._proc.stdin is not None:
+            self._proc.stdin.close()
+            await self._proc.wait()
+
+
+def _new_digest(algo: str):
+    if algo == "blake3":
+        if blake3 is None:
+            raise SystemExit("--hash-algo blake3 requires the blake3 package")
+        # blake3's tree hash parallelizes across cores on large inputs.
+        return blake3.blake3(max_threads=blake3.blake3.AUTO)
+    return hashlib.new(algo)
+
+
+def digest_file(path: Path, algo: str = "sha256") -> str:
+    if algo == "blake3":
+        digest = _new_digest(algo)
+        digest.update_mmap(str(path))
+        return digest.hexdigest()
     with path.open("rb") as handle:
-        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
-            digest.update(chunk)
-    return digest.hexdigest()
+        if hasattr(hashlib, "file_digest"):  # Python 3.11+
+            return hashlib.file_digest(handle, algo).hexdigest()
+        # Fallback for older interpreters: reuse one 1 MiB buffer via readinto
+        # instead of allocating a fresh bytes object per chunk.
+        digest = hashlib.new(algo)
+        buf = bytearray(1 << 20)
+        view = memoryview(buf)
+        while n := handle.readinto(buf):
+            digest.update(view[:n])
+        return digest.hexdigest()
+
+
+def sha256sum(path: Path) -> str:
+    return digest_file(path, "sha256")
 
 
 def build_standalone(
@@ -39,27 +178,32 @@ def build_standalone(
     output_dir: Path,
     aider_source_path: Path | None = None,
     variant: str = "aider-chat",
+    cache_dir: Path | None = None,
+    compress: bool = False,
+    hash_algo: str = "sha256",
+    reuse_env: bool = False,
 ) -> Dict[str, str]:
     output_dir.mkdir(parents=True, exist_ok=True)
+    # Reusing the caller's interpreter only makes sense for source builds,
+    # where a working aider dev environment (with pip-tools and PyInstaller
+    # installed) is already at hand; release builds keep full isolation.
+    reuse_current = bool(reuse_env and aider_source_path)
     with tempfile.TemporaryDirectory(prefix="aider-standalone-") as tmp:
         tmp_path = Path(tmp)
         venv_dir = tmp_path / "venv"
-        python = Path(sys.executable)
-        run([str(python), "-m", "venv", str(venv_dir)])
-        venv_python = venv_dir / "bin" / "python"
-        venv_pip = venv_dir / "bin" / "pip"
-
-        run([str(venv_pip), "install", "--upgrade", "pip", "setuptools", "wheel"])
-        run([str(venv_pip), "install", "pip-tools", "pyinstaller"])
+        venv_python = Path(sys.executable) if reuse_current else venv_dir / "bin" / "python"
 
         requirements_in = tmp_path / "requirements.in"
         requirements_lock = tmp_path / "requirements.lock"
 
         if aider_source_path:
-            # Install aider from local source first
-            run([str(venv_pip), "install", str(aider_source_path)])
-            # Only compile tree-sitter-languages with hashes
+            # Only compile tree-sitter-languages with hashes; aider itself is
+            # installed from the local source tree below.
             requirements = ["tree-sitter-languages"]
+            if reuse_current:
+                # Pin the resolve to what the caller's environment already
+                # has installed; the constraints file is generated below.
+                requirements.insert(0, "-c constraints.txt")
         else:
             # Use correct PyPI package based on variant
             # aider-ce PyPI package is deprecated, use cecli-dev instead
@@ -71,64 +215,127 @@ def build_standalone(
                 f"{package_name}=={aider_version}",
                 "tree-sitter-languages",
             ]
-        requirements_in.write_text("\n".join(requirements) + "\n", encoding="utf-8")
-
-        run(
-            [
-                str(venv_python),
-                "-m",
-                "piptools",
-                "compile",
-                "--generate-hashes",
-                "--resolver=backtracking",
-                str(requirements_in),
-                "-o",
-                str(requirements_lock),
-            ]
-        )
-
-        run([str(venv_pip), "install", "--require-hashes", "-r", str(requirements_lock)])
+        requirements_text = "\n".join(requirements) + "\n"
+        requirements_in.write_text(requirements_text, encoding="utf-8")
+
+        # Source builds are never cached: the cache key only covers the
+        # pinned requirements, not the contents of the source tree.
+        cache_entry: Path | None = None
+        if cache_dir and not aider_source_path:
+            key = hashlib.sha256(
+                f"{requirements_text}\n{sys.version}\n{variant}".encode("utf-8")
+            ).hexdigest()
+            cache_entry = cache_dir / key
+
+        # Point pip-tools and pip at the same cache so the wheels downloaded
+        # while resolving the lock are reused by the hashed install instead
+        # of being fetched twice. The env var also reaches the pip that
+        # pip-tools spawns internally, unlike a --cache-dir argument.
+        pip_env = os.environ.copy()
+        pip_env["PIP_CACHE_DIR"] = str(cache_dir / "pip" if cache_dir else tmp_path / "pipcache")
+
+        cached_venv = cache_entry / "venv" if cache_entry else None
+        cached_lock = cache_entry / "requirements.lock" if cache_entry else None
+        if reuse_current:
+            # No venv, no installs: compute the reproducible lock against
+            # the caller's environment and bundle straight from it.
+            freeze = subprocess.run(
+                [str(venv_python), "-m", "pip", "freeze"],
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+            (tmp_path / "constraints.txt").write_text(freeze.stdout, encoding="utf-8")
+            run(
+                [
+                    str(venv_python),
+                    "-m",
+                    "piptools",
+                    "compile",
+                    "--generate-hashes",
+                    "--resolver=backtracking",
+                    str(requirements_in),
+                    "-o",
+                    str(requirements_lock),
+                ],
+                env=pip_env,
+            )
+        elif cached_venv and cached_venv.is_dir() and cached_lock and cached_lock.is_file():
+            # Symlinks must be preserved or the copied venv's python breaks.
+            shutil.copytree(cached_venv, venv_dir, symlinks=True)
+            shutil.copy2(cached_lock, requirements_lock)
+        else:
+            # Create the venv in-process with symlinks: no interpreter spawn,
+            # no copied binaries, and ensurepip's bundled pip is recent
+            # enough that the old pip/setuptools/wheel upgrade pass is
+            # unnecessary.
+            print(f":: Creating venv at {venv_dir}")
+            venv.EnvBuilder(symlinks=True, with_pip=True).create(str(venv_dir))
+
+            async def _provision() -> None:
+                # All pip commands go through one driver process so pip is
+                # imported a single time for the whole build.
+                driver = PipDriver(venv_python, tmp_path, env=pip_env)
+                await driver.start()
+                try:
+                    await driver.run(["install", "pip-tools"])
+
+                    async def _pip_installs() -> None:
+                        # pip installs into the same venv must stay serial,
+                        # but nothing here is needed by the lock resolve.
+                        await driver.run(["install", "pyinstaller"])
+                        if aider_source_path:
+                            # Install aider from local source first
+                            await driver.run(["install", str(aider_source_path)])
+
+                    # The lock resolve only needs pip-tools and PyInstaller
+                    # is not needed until bundling, so the two run
+                    # concurrently.
+                    await asyncio.gather(
+                        _pip_installs(),
+                        run_async(
+                            [
+                                str(venv_python),
+                                "-m",
+                                "piptools",
+                                "compile",
+                                "--generate-hashes",
+                                "--resolver=backtracking",
+                                str(requirements_in),
+                                "-o",
+                                str(requirements_lock),
+                            ],
+                            env=pip_env,
+                        ),
+                    )
+
+                    await driver.run(
+                        ["install", "--require-hashes", "-r", str(requirements_lock)]
+                    )
+                finally:
+                    await driver.close()
+
+            asyncio.run(_provision())
+
+            if cache_entry:
+                cache_entry.mkdir(parents=True, exist_ok=True)
+                if not cached_venv.exists():
+                    shutil.copytree(venv_dir, cached_venv, symlinks=True)
+                shutil.copy2(requirements_lock, cached_lock)
 
         binary_name = f"aider-standalone"
         dist_dir = tmp_path / "dist"
 
         launcher_path = tmp_path / "launch_aider.py"
-        # Determine module name and entry point based on variant and source
-        # - aider-ce from source (GitHub): uses 'aider' module with aider.main:main
-        # - aider-ce from PyPI (cecli-dev): uses 'cecli' module with cecli.main:main
-        # - aider-chat: uses 'aider' module with aider.__main__:main
-        if variant == "aider-ce":
-            if aider_source_path:
-                # Building from source - uses aider module
-                module_name = "aider"
-                launcher_code = """\
-from aider.main import main
-
-
-if __name__ == "__main__":
-    main()
-"""
-            else:
-                # Building from PyPI (cecli-dev) - uses cecli module
-                module_name = "cecli"
-                launcher_code = """\
-from cecli.main import main
-
-
-if __name__ == "__main__":
-    main()
-"""
-        else:
-            module_name = "aider"
-            launcher_code = """\
-from aider.__main__ import main
-
-
-if __name__ == "__main__":
-    main()
-"""
-        launcher_path.write_text(launcher_code, encoding="utf-8")
+        module_name, entry_module = LAUNCHER_CONFIGS[(variant, bool(aider_source_path))]
+        launcher_path.write_text(
+            LAUNCHER_TEMPLATE.format(entry_module=entry_module), encoding="utf-8"
+        )
 
+        # Isolate the PyInstaller cache per build so concurrent variant
+        # builds cannot corrupt a shared cache directory.
+        pyinstaller_env = os.environ.copy()
+        pyinstaller_env["PYINSTALLER_CONFIG_DIR"] = str(tmp_path / "pyi-cache")
         pyinstaller_cmd = [
             str(venv_python),
             "-m",
@@ -142,49 +349,126 @@ if __name__ == "__main__":
             "./.aider-standalone-tmp",
             "--collect-all",
             module_name,
-            "--collect-data",
-            "litellm",
-            "--collect-submodules",
+            "--collect-all",
             "litellm",
             "--collect-data",
             "tiktoken",
+            # The tiktoken_ext directives already cover the openai_public
+            # subpackage; listing it separately just makes ModuleGraph walk
+            # the same nodes twice.
             "--collect-data",
             "tiktoken_ext",
             "--collect-submodules",
             "tiktoken_ext",
             "--collect-data",
-            "tiktoken_ext.openai_public",
-            "--collect-submodules",
-            "tiktoken_ext.openai_public",
-            "--collect-data",
             "tree_sitter_languages",
             "--collect-submodules",
             "tree_sitter_languages",
             "--collect-binaries",
             "tree_sitter_languages",
-            str(launcher_path),
+            "--exclude-module",
+            "tkinter",
         ]
-        run(pyinstaller_cmd, cwd=tmp_path)
+        if not compress:
+            # UPX is a serial pass over every bundled binary at build time
+            # and its decompression is paid again on every launch.
+            pyinstaller_cmd.append("--noupx")
+        pyinstaller_cmd.append(str(launcher_path))
 
         artifact = dist_dir / binary_name
+        run(pyinstaller_cmd, env=pyinstaller_env, cwd=tmp_path)
+
         if not artifact.exists():
             raise SystemExit(f"PyInstaller failed to produce expected artifact at {artifact}")
 
+        # The temp dir is discarded at block exit, so move rather than copy:
+        # a same-filesystem rename is O(1) instead of rewriting ~100+ MB.
         final_artifact = output_dir / f"aider-standalone-build{build_number}"
-        shutil.copy2(artifact, final_artifact)
+        shutil.move(artifact, final_artifact)
         os.chmod(final_artifact, 0o755)
 
         final_lock = output_dir / "requirements.lock"
-        shutil.copy2(requirements_lock, final_lock)
 
-    checksum = sha256sum(final_artifact)
+        # The digest is the published verification value, so it must be
+        # computed from the bytes on disk; the lock move overlaps with it.
+        async def _finalize() -> str:
+            digest, _ = await asyncio.gather(
+                asyncio.to_thread(digest_file, final_artifact, hash_algo),
+                asyncio.to_thread(shutil.move, requirements_lock, final_lock),
+            )
+            return digest
+
+        checksum = asyncio.run(_finalize())
+
     return {
         "artifact": str(final_artifact),
         "checksum": checksum,
+        "checksum_algo": hash_algo,
         "lock_file": str(final_lock),
     }
 
 
+def build_all(
+    variants: list[str],
+    aider_version: str,
+    build_number: int,
+    output_dir: Path,
+    aider_source_path: Path | None = None,
+    cache_dir: Path | None = None,
+    compress: bool = False,
+    hash_algo: str = "sha256",
+    reuse_env: bool = False,
+) -> Dict[str, Dict[str, str]]:
+    """Build every variant concurrently, one worker process per variant.
+
+    PyInstaller is not internally parallel, but independent variant builds
+    are. Each build already runs inside its own temporary directory with an
+    isolated PyInstaller cache, so workers cannot collide; artifacts go to
+    a per-variant subdirectory of ``output_dir``.
+    """
+    results: Dict[str, Dict[str, str]] = {}
+    with concurrent.futures.ProcessPoolExecutor(max_workers=len(variants)) as pool:
+        futures = {
+            pool.submit(
+                build_standalone,
+                aider_version,
+                build_number,
+                output_dir / variant,
+                aider_source_path=aider_source_path,
+                variant=variant,
+                cache_dir=cache_dir,
+                compress=compress,
+                hash_algo=hash_algo,
+                reuse_env=reuse_env,
+            ): variant
+            for variant in variants
+        }
+        for future in concurrent.futures.as_completed(futures):
+            results[futures[future]] = future.result()
+    return results
+
+
+def _manifest_entry(
+    variant: str,
+    aider_version: str,
+    build_number: int,
+    metadata: Dict[str, str],
+) -> Dict[str, object]:
+    entry: Dict[str, object] = {
+        "variant": variant,
+        "aider_version": aider_version,
+        "build_number": build_number,
+        "artifact_path": metadata["artifact"],
+        "artifact_digest": metadata["checksum"],
+        "artifact_digest_algo": metadata["checksum_algo"],
+        "lock_file": metadata["lock_file"],
+    }
+    if metadata["checksum_algo"] == "sha256":
+        # Kept for consumers that still read the pre-digest-algo field.
+        entry["artifact_sha256"] = metadata["checksum"]
+    return entry
+
+
 def main(argv: list[str] | None = None) -> int:
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument("--aider-version", required=True)
@@ -202,24 +486,71 @@ def main(argv: list[str] | None = None) -> int:
         default="aider-chat",
         help="Which aider variant to build (default: aider-chat)",
     )
-    args = parser.parse_args(argv)
-
-    metadata = build_standalone(
-        args.aider_version,
-        args.build_number,
-        args.output_dir,
-        aider_source_path=args.aider_source_path,
-        variant=args.variant,
+    parser.add_argument(
+        "--variants",
+        help="Comma-separated variants to build in parallel (overrides --variant)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        help="Directory for caching venvs, lock files, and downloaded wheels between builds",
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="Let PyInstaller apply UPX compression (slower build and startup, smaller artifact)",
+    )
+    parser.add_argument(
+        "--reuse-env",
+        action="store_true",
+        help="Build with the current interpreter instead of a fresh venv "
+        "(source builds only; requires pip-tools and PyInstaller installed)",
     )
+    parser.add_argument(
+        "--hash-algo",
+        choices=["sha256", "sha512", "blake3"],
+        default="sha256",
+        help="Digest algorithm for the artifact checksum (default: sha256)",
+    )
+    args = parser.parse_args(argv)
 
-    manifest = {
-        "variant": args.variant,
-        "aider_version": args.aider_version,
-        "build_number": args.build_number,
-        "artifact_path": metadata["artifact"],
-        "artifact_sha256": metadata["checksum"],
-        "lock_file": metadata["lock_file"],
-    }
+    if args.reuse_env and not args.aider_source_path:
+        raise SystemExit("--reuse-env requires --aider-source-path")
+
+    if args.variants:
+        variants = [v.strip() for v in args.variants.split(",") if v.strip()]
+        known = {variant for variant, _ in LAUNCHER_CONFIGS}
+        unknown = [v for v in variants if v not in known]
+        if unknown:
+            raise SystemExit(f"Unknown variant(s): {', '.join(unknown)}")
+        results = build_all(
+            variants,
+            args.aider_version,
+            args.build_number,
+            args.output_dir,
+            aider_source_path=args.aider_source_path,
+            cache_dir=args.cache_dir,
+            compress=args.compress,
+            hash_algo=args.hash_algo,
+            reuse_env=args.reuse_env,
+        )
+        manifest = {
+            variant: _manifest_entry(variant, args.aider_version, args.build_number, metadata)
+            for variant, metadata in results.items()
+        }
+    else:
+        metadata = build_standalone(
+            args.aider_version,
+            args.build_number,
+            args.output_dir,
+            aider_source_path=args.aider_source_path,
+            variant=args.variant,
+            cache_dir=args.cache_dir,
+            compress=args.compress,
+            hash_algo=args.hash_algo,
+            reuse_env=args.reuse_env,
+        )
+        manifest = _manifest_entry(args.variant, args.aider_version, args.build_number, metadata)
     args.metadata.write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
     print(json.dumps(manifest))
     return 0
@@ -8,40 +8,37 @@ import json
 import os
 import re
 import sys
+import hashlib
+import tempfile
 import urllib.error
 import urllib.request
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Dict, Iterable, Optional
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional
 
 API_BASE = "https://api.github.com"
 DEFAULT_VARIANT = "aider-chat"
 
+VARIANTS = ("aider-chat", "aider-ce")
+
+# Flat (variant, source_type) keys: one lookup with a single tuple hash
+# instead of two chained dict lookups per call.
 RELEASE_TAG_TEMPLATES = {
-    "aider-chat": {
-        "pypi": "standalone-v{aider_version}-build{build_number}",
-        "main": "standalone-main-{date}-{commit_hash}-build{build_number}",
-    },
-    "aider-ce": {
-        "pypi": "standalone-ce-v{aider_version}-build{build_number}",
-        "main": "standalone-ce-main-{date}-{commit_hash}-build{build_number}",
-    },
+    ("aider-chat", "pypi"): "standalone-v{aider_version}-build{build_number}",
+    ("aider-chat", "main"): "standalone-main-{date}-{commit_hash}-build{build_number}",
+    ("aider-ce", "pypi"): "standalone-ce-v{aider_version}-build{build_number}",
+    ("aider-ce", "main"): "standalone-ce-main-{date}-{commit_hash}-build{build_number}",
 }
 
-RE_RELEASE_TAGS = {
-    "aider-chat": {
-        "pypi": re.compile(r"^standalone-v(?P<version>[^-]+)-build(?P<build>\d+)$"),
-        "main": re.compile(
-            r"^standalone-main-(?P<date>\d{8})-(?P<commit>[a-f0-9]+)-build(?P<build>\d+)$"
-        ),
-    },
-    "aider-ce": {
-        "pypi": re.compile(r"^standalone-ce-v(?P<version>[^-]+)-build(?P<build>\d+)$"),
-        "main": re.compile(
-            r"^standalone-ce-main-(?P<date>\d{8})-(?P<commit>[a-f0-9]+)-build(?P<build>\d+)$"
-        ),
-    },
-}
+# One anchored union pattern covers all four variant/source combinations;
+# the optional "ce" prefix and the version-vs-date alternation replace the
+# four near-identical per-variant patterns compiled previously.
+RELEASE_TAG_RE = re.compile(
+    r"^standalone-(?:(?P<ce>ce)-)?"
+    r"(?:v(?P<version>[^-]+)|main-(?P<date>\d{8})-(?P<commit>[a-f0-9]+))"
+    r"-build(?P<build>\d+)$"
+)
 
 
 @dataclass
@@ -49,43 +46,131 @@ class ReleaseInfo:
     build_number: int
 
 
-def fetch_releases(repo: str, token: str) -> Iterable[Dict[str, object]]:
+# Release objects carry assets, uploader, body text, and reactions; only the
+# tag names matter here, so the fallback scanner never builds the full dicts.
+_TAG_NAME_RE = re.compile(rb'"tag_name"\s*:\s*"([^"]*)"')
+
+
+def iter_release_tag_names(repo: str, token: str) -> Iterator[str]:
     url = f"{API_BASE}/repos/{repo}/releases?per_page=100"
     headers = {"Authorization": f"Bearer {token}", "Accept": "application/vnd.github+json"}
     req = urllib.request.Request(url, headers=headers)
     with urllib.request.urlopen(req) as resp:  # type: ignore[no-untyped-call]
-        data = json.loads(resp.read().decode("utf-8"))
-    if not isinstance(data, list):
-        raise SystemExit(f"Unexpected response when querying releases for {repo}")
-    return data
+        try:
+            import ijson
+        except ImportError:
+            # No streaming parser available; scan the raw bytes for tag_name
+            # fields rather than materializing every release as a dict.
+            for match in _TAG_NAME_RE.finditer(resp.read()):
+                yield match.group(1).decode("utf-8")
+            return
+        for tag_name in ijson.items(resp, "item.tag_name"):
+            if isinstance(tag_name, str):
+                yield tag_name
+
+
+def _tag_prefix(variant: str, source_type: str) -> str:
+    prefix = "standalone-ce-" if variant == "aider-ce" else "standalone-"
+    return prefix + ("main-" if source_type == "main" else "v")
+
+
+# In-process memo for tag fetches, so resolving several variants in one
+# invocation performs one network round-trip per distinct tag prefix. The
+# token is keyed by its hash to keep it out of cache keys and tracebacks.
+_tags_cache: Dict[tuple[str, str, str], list[str]] = {}
+
+
+def fetch_release_tags(
+    repo: str,
+    token: str,
+    variant: str = DEFAULT_VARIANT,
+    source_type: str = "pypi",
+) -> list[str]:
+    """Fetch the release tag names relevant to one variant/source combination.
+
+    Uses the matching-refs endpoint, which returns only the tags starting
+    with the standalone prefix instead of the full release objects, and
+    sends a conditional request with the ETag cached under ``RUNNER_TEMP``
+    so unchanged tag lists cost a single 304 round-trip. Falls back to
+    listing releases if the refs endpoint is unavailable. Results are
+    memoized per process.
+    """
+    url = f"{API_BASE}/repos/{repo}/git/matching-refs/tags/{_tag_prefix(variant, source_type)}"
+    token_hash = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    memo_key = (repo, token_hash, url)
+    if memo_key in _tags_cache:
+        return _tags_cache[memo_key]
+    headers = {"Authorization": f"Bearer {token}", "Accept": "application/vnd.github+json"}
+
+    cache_base = Path(os.environ.get("RUNNER_TEMP", tempfile.gettempdir()))
+    cache_key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
+    body_cache = cache_base / f"matching-refs-{cache_key}.json"
+    etag_cache = cache_base / f"matching-refs-{cache_key}.etag"
+    if body_cache.is_file() and etag_cache.is_file():
+        headers["If-None-Match"] = etag_cache.read_text(encoding="utf-8").strip()
+
+    req = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(req) as resp:  # type: ignore[no-untyped-call]
+            body = resp.read()
+            etag = resp.headers.get("ETag")
+        if etag:
+            body_cache.write_bytes(body)
+            etag_cache.write_text(etag, encoding="utf-8")
+    except urllib.error.HTTPError as exc:
+        if exc.code == 304:
+            body = body_cache.read_bytes()
+        else:
+            tags = list(iter_release_tag_names(repo, token))
+            _tags_cache[memo_key] = tags
+            return tags
+
+    refs = json.loads(body.decode("utf-8"))
+    if not isinstance(refs, list):
+        raise SystemExit(f"Unexpected response when querying matching refs for {repo}")
+    tags = [
+        ref["ref"][len("refs/tags/"):]
+        for ref in refs
+        if isinstance(ref, dict) and isinstance(ref.get("ref"), str)
+    ]
+    _tags_cache[memo_key] = tags
+    return tags
 
 
 def next_build_number(
-    releases: Iterable[Dict[str, object]],
+    tags: Iterable[str],
     aider_version: str,
     source_type: str = "pypi",
     date_str: str | None = None,
     commit_hash: str | None = None,
     variant: str = DEFAULT_VARIANT,
+    assume_newest_first: bool = False,
 ) -> int:
-    max_build = 0
-    pattern = RE_RELEASE_TAGS[variant][source_type]
-    for release in releases:
-        tag_name = release.get("tag_name") if isinstance(release, dict) else None
-        if not isinstance(tag_name, str):
-            continue
-        match = pattern.match(tag_name)
-        if not match:
+    """Return one more than the highest build number among matching tags.
+
+    Every tag is scanned by default. Pass ``assume_newest_first=True``
+    to stop at the first tag matching the full variant/source/version
+    triple — only safe when the caller guarantees numeric newest-first
+    ordering, which neither the matching-refs endpoint (lexicographic,
+    build10 before build9) nor the releases listing (creation date)
+    provides.
+    """
+    want_ce = "ce" if variant == "aider-ce" else None
+    tag_match = RELEASE_TAG_RE.match
+    builds = []
+    for tag_name in tags:
+        match = tag_match(tag_name)
+        if not match or match.group("ce") != want_ce:
             continue
         if source_type == "main":
             if match.group("date") != date_str or match.group("commit") != commit_hash:
                 continue
-        else:
-            if match.group("version") != aider_version:
-                continue
-        build_number = int(match.group("build"))
-        max_build = max(max_build, build_number)
-    return max_build + 1
+        elif match.group("version") != aider_version:
+            continue
+        if assume_newest_first:
+            return int(match.group("build")) + 1
+        builds.append(int(match.group("build")))
+    return max(builds, default=0) + 1
 
 
 def build_metadata(
@@ -96,7 +181,7 @@ def build_metadata(
     commit_hash: str | None = None,
     variant: str = DEFAULT_VARIANT,
 ) -> Dict[str, object]:
-    template = RELEASE_TAG_TEMPLATES[variant][source_type]
+    template = RELEASE_TAG_TEMPLATES[(variant, source_type)]
     if source_type == "main":
         tag_name = template.format(
             date=date_str, commit_hash=commit_hash, build_number=build_number
@@ -151,56 +236,70 @@ def main(argv: Optional[list[str]] = None) -> int:
     )
     parser.add_argument(
         "--variant",
-        choices=["aider-chat", "aider-ce"],
         default="aider-chat",
-        help="Which aider variant to build (default: aider-chat)",
+        help="Variant(s) to compute metadata for, comma-separated (default: aider-chat)",
     )
     args = parser.parse_args(argv)
 
     if args.source_type == "main" and (not args.commit_hash or not args.date):
         raise SystemExit("--commit-hash and --date are required for main branch builds")
 
-    build_number = args.override_build_number
-    if build_number is None:
-        repo = os.environ.get("GITHUB_REPOSITORY")
-        token = os.environ.get("GITHUB_TOKEN")
-        if not repo or not token:
-            raise SystemExit(
-                "GITHUB_REPOSITORY and GITHUB_TOKEN must be set to compute build numbers automatically"
+    variants = [v.strip() for v in args.variant.split(",") if v.strip()]
+    unknown = [v for v in variants if v not in VARIANTS]
+    if unknown:
+        raise SystemExit(f"Unknown variant(s): {', '.join(unknown)}")
+    multi = len(variants) > 1
+
+    for variant in variants:
+        build_number = args.override_build_number
+        if build_number is None:
+            repo = os.environ.get("GITHUB_REPOSITORY")
+            token = os.environ.get("GITHUB_TOKEN")
+            if not repo or not token:
+                raise SystemExit(
+                    "GITHUB_REPOSITORY and GITHUB_TOKEN must be set to compute build numbers automatically"
+                )
+            try:
+                tags = fetch_release_tags(
+                    repo, token, variant=variant, source_type=args.source_type
+                )
+            except urllib.error.URLError as exc:  # pragma: no cover - network failure
+                raise SystemExit(f"Failed to query GitHub release tags: {exc}")
+            build_number = next_build_number(
+                tags,
+                args.aider_version,
+                source_type=args.source_type,
+                date_str=args.date,
+                commit_hash=args.commit_hash,
+                variant=variant,
             )
-        try:
-            releases = list(fetch_releases(repo, token))
-        except urllib.error.URLError as exc:  # pragma: no cover - network failure
-            raise SystemExit(f"Failed to query GitHub releases: {exc}")
-        build_number = next_build_number(
-            releases,
+
+        metadata = build_metadata(
             args.aider_version,
+            build_number,
             source_type=args.source_type,
             date_str=args.date,
             commit_hash=args.commit_hash,
-            variant=args.variant,
+            variant=variant,
         )
 
-    metadata = build_metadata(
-        args.aider_version,
-        build_number,
-        source_type=args.source_type,
-        date_str=args.date,
-        commit_hash=args.commit_hash,
-        variant=args.variant,
-    )
-
-    with open(args.output, "w", encoding="utf-8") as handle:
-        json.dump(metadata, handle, indent=2)
-        handle.write("\n")
+        output = Path(args.output)
+        if multi:
+            output = output.with_name(f"{output.stem}-{variant}{output.suffix}")
+        with open(output, "w", encoding="utf-8") as handle:
+            json.dump(metadata, handle, indent=2)
+            handle.write("\n")
 
-    if args.github_output:
-        with open(args.github_output, "a", encoding="utf-8") as handle:
-            handle.write(f"build_number={metadata['build_number']}\n")
-            handle.write(f"tag_name={metadata['tag_name']}\n")
-            handle.write(f"artifact_name={metadata['artifact_name']}\n")
+        if args.github_output:
+            # Prefix the output keys per variant so a multi-variant run does
+            # not clobber its own values.
+            prefix = f"{variant.replace('-', '_')}_" if multi else ""
+            with open(args.github_output, "a", encoding="utf-8") as handle:
+                handle.write(f"{prefix}build_number={metadata['build_number']}\n")
+                handle.write(f"{prefix}tag_name={metadata['tag_name']}\n")
+                handle.write(f"{prefix}artifact_name={metadata['artifact_name']}\n")
 
-    print(json.dumps(metadata))
+        print(json.dumps(metadata))
     return 0
 
 
@@ -4,41 +4,133 @@
 from __future__ import annotations
 
 import argparse
-import json
+import functools
+import gzip
+import heapq
+import os
 import sys
+import tempfile
 import urllib.error
 import urllib.request
+from pathlib import Path
 from typing import Any, Dict
 
+try:
+    import orjson as _json
+except ImportError:  # pragma: no cover - optional dependency
+    import json as _json
+
+try:
+    import simdjson
+except ImportError:  # pragma: no cover - optional dependency
+    simdjson = None
+
+# pysimdjson's parser is reusable; one instance amortizes its internal
+# buffers across every parse in the process.
+_simdjson_parser = simdjson.Parser() if simdjson is not None else None
+
+try:
+    from packaging.version import Version as _version_key
+
+    _have_packaging = True
+except ImportError:  # pragma: no cover - optional dependency
+    _have_packaging = False
+
+    def _version_key(version: str) -> tuple[int, ...]:
+        # Crude numeric ordering so "0.10" still sorts above "0.9".
+        return tuple(int(part) if part.isdigit() else -1 for part in version.split("."))
+
+# The Simple v1 JSON responses are a few KB versus the multi-megabyte
+# full-metadata envelope, and carry the versions list this script needs.
 PYPI_URLS = {
-    "aider-chat": "https://pypi.org/pypi/aider-chat/json",
+    "aider-chat": "https://pypi.org/simple/aider-chat/",
     # aider-ce is deprecated, use cecli-dev instead for PyPI builds
-    "aider-ce": "https://pypi.org/pypi/cecli-dev/json",
+    "aider-ce": "https://pypi.org/simple/cecli-dev/",
 }
+SIMPLE_ACCEPT = "application/vnd.pypi.simple.v1+json"
 DEFAULT_VARIANT = "aider-chat"
 
 
-def fetch_release_data(variant: str = DEFAULT_VARIANT) -> Dict[str, Any]:
+@functools.lru_cache(maxsize=None)
+def _fetch_body(variant: str) -> bytes:
+    """Fetch (or 304-revalidate) the Simple API body for one variant.
+
+    Memoized on the raw bytes rather than the parsed document so repeat
+    calls skip the network round-trip without handing out pysimdjson lazy
+    documents that a later parse would have invalidated.
+    """
     url = PYPI_URLS.get(variant, PYPI_URLS[DEFAULT_VARIANT])
-    req = urllib.request.Request(url)
-    with urllib.request.urlopen(req) as resp:  # type: ignore[no-untyped-call]
-        return json.loads(resp.read().decode("utf-8"))
+    # JSON compresses roughly 10x with gzip; urllib negotiates no encoding
+    # by itself, so ask for it and inflate manually.
+    headers = {"Accept": SIMPLE_ACCEPT, "Accept-Encoding": "gzip"}
+
+    # Conditional GET: repeated invocations in one workflow run (one per
+    # variant or matrix leg) are answered with a bodiless 304 and reuse
+    # the body cached under RUNNER_TEMP.
+    cache_base = Path(os.environ.get("RUNNER_TEMP", tempfile.gettempdir()))
+    body_cache = cache_base / f"pypi-{variant}.json"
+    etag_cache = cache_base / f"pypi-{variant}.etag"
+    if body_cache.is_file() and etag_cache.is_file():
+        headers["If-None-Match"] = etag_cache.read_text(encoding="utf-8").strip()
+
+    req = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(req) as resp:  # type: ignore[no-untyped-call]
+            body = resp.read()
+            if resp.headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            etag = resp.headers.get("ETag")
+        if etag:
+            body_cache.write_bytes(body)
+            etag_cache.write_text(etag, encoding="utf-8")
+    except urllib.error.HTTPError as exc:
+        if exc.code != 304:
+            raise
+        body = body_cache.read_bytes()
+    return body
+
+
+def fetch_release_data(variant: str = DEFAULT_VARIANT) -> Dict[str, Any]:
+    body = _fetch_body(variant)
+    if _simdjson_parser is not None:
+        # Lazy document: only the fields actually accessed below get
+        # materialized as Python objects, skipping the thousands of unused
+        # per-release file records.
+        return _simdjson_parser.parse(body)
+    # Both fallback parsers take bytes directly; skipping the decode also
+    # skips one full-payload copy.
+    return _json.loads(body)
 
 
 def resolve_version(requested: str | None, variant: str = DEFAULT_VARIANT) -> str:
     data = fetch_release_data(variant)
+    # Indexing plus KeyError works for both plain dicts and pysimdjson's
+    # lazy objects, which have no .get().
+    try:
+        versions = data["versions"]
+    except KeyError:
+        versions = []
     if requested:
-        if requested not in data.get("releases", {}):
-            available = sorted(data.get("releases", {}).keys(), reverse=True)
+        if requested not in versions:
+            # Partial sort: O(N log 20) for the top 20, ordered by version
+            # semantics rather than lexicographically.
+            available = heapq.nlargest(20, versions, key=_version_key)
             raise SystemExit(
                 f"Requested {variant} version '{requested}' was not found on PyPI. "
-                f"Available versions (newest first): {', '.join(available[:20])}"
+                f"Available versions (newest first): {', '.join(available)}"
             )
         return requested
-    version = data.get("info", {}).get("version")
-    if not version:
+    if not len(versions):
         raise SystemExit(f"Unable to determine latest {variant} release from PyPI response")
-    return version
+    # PEP 700 leaves the order of the versions array unspecified, and it
+    # includes pre-releases; pick the highest final release by version
+    # semantics so an rc/dev upload never becomes "latest".
+    if _have_packaging:
+        finals = [str(v) for v in versions if not _version_key(str(v)).is_prerelease]
+        if finals:
+            return max(finals, key=_version_key)
+    # Without packaging, fall back to PyPI's current oldest-to-newest order.
+    return str(list(versions)[-1])
 
 
 def main(argv: list[str] | None = None) -> int:
@@ -46,9 +138,8 @@ def main(argv: list[str] | None = None) -> int:
     parser.add_argument("--requested", help="Explicit aider version to use", default=None)
     parser.add_argument(
         "--variant",
-        choices=["aider-chat", "aider-ce"],
         default="aider-chat",
-        help="Which aider variant to query (default: aider-chat)",
+        help="Variant(s) to query, comma-separated (default: aider-chat)",
     )
     parser.add_argument(
         "--github-output",
@@ -56,15 +147,25 @@ def main(argv: list[str] | None = None) -> int:
     )
     args = parser.parse_args(argv)
 
-    try:
-        version = resolve_version(args.requested, args.variant)
-    except urllib.error.URLError as exc:  # pragma: no cover - network failure
-        raise SystemExit(f"Failed to query PyPI for {args.variant} releases: {exc}")
-
-    print(version)
-    if args.github_output:
-        with open(args.github_output, "a", encoding="utf-8") as handle:
-            handle.write(f"aider_version={version}\n")
+    variants = [v.strip() for v in args.variant.split(",") if v.strip()]
+    unknown = [v for v in variants if v not in PYPI_URLS]
+    if unknown:
+        raise SystemExit(f"Unknown variant(s): {', '.join(unknown)}")
+    multi = len(variants) > 1
+
+    for variant in variants:
+        try:
+            version = resolve_version(args.requested, variant)
+        except urllib.error.URLError as exc:  # pragma: no cover - network failure
+            raise SystemExit(f"Failed to query PyPI for {variant} releases: {exc}")
+
+        print(version)
+        if args.github_output:
+            # Prefix per variant in multi-variant mode so the outputs of one
+            # resolve do not clobber the other's.
+            key = f"{variant.replace('-', '_')}_version" if multi else "aider_version"
+            with open(args.github_output, "a", encoding="utf-8") as handle:
+                handle.write(f"{key}={version}\n")
     return 0
 
 